@@ -15,22 +15,17 @@ from filters.reply_filter import ReplyFilter
 from filters.rss_filter import RSSFilter
 logger = logging.getLogger(__name__)
 
-async def process_forward_rule(client, event, chat_id, rule):
-    """
-    处理转发规则
-    
-    Args:
-        client: 机器人客户端
-        event: 消息事件
-        chat_id: 聊天ID
-        rule: 转发规则
-        
-    Returns:
-        bool: 处理是否成功
-    """
-    logger.info(f'使用过滤器链处理规则 ID: {rule.id}')
+# 过滤器均为无状态对象，过滤器链在首次处理消息时创建一次，之后所有消息共用
+# 延迟创建可避免在导入模块时执行过滤器初始化（如RSSFilter创建媒体目录）
+_FILTER_CHAIN = None
+
+
+def _get_filter_chain():
+    """获取共用的过滤器链，首次调用时创建"""
+    global _FILTER_CHAIN
+    if _FILTER_CHAIN is not None:
+        return _FILTER_CHAIN
     
-    # 创建过滤器链
     filter_chain = FilterChain()
 
     # 添加初始化过滤器
@@ -38,41 +33,60 @@ async def process_forward_rule(client, event, chat_id, rule):
 
     # 延迟处理过滤器（如果启用了延迟处理）
     filter_chain.add_filter(DelayFilter())
-    
+
     # 添加关键字过滤器（如果消息不匹配关键字，会中断处理链）
     filter_chain.add_filter(KeywordFilter())
-    
+
     # 添加替换过滤器
     filter_chain.add_filter(ReplaceFilter())
-    
+
     # 添加AI处理过滤器（如果启用了AI处理后的关键字检查，可能会中断处理链）
     filter_chain.add_filter(AIFilter())
-    
+
     # 添加信息过滤器（处理原始链接和发送者信息）
     filter_chain.add_filter(InfoFilter())
-    
+
     # 添加媒体过滤器（处理媒体内容）
     filter_chain.add_filter(MediaFilter())
-    
+
     # 添加评论区按钮过滤器
     filter_chain.add_filter(CommentButtonFilter())
 
     # 添加RSS过滤器
     filter_chain.add_filter(RSSFilter())
-    
+
     # 添加编辑过滤器（编辑原始消息）
     filter_chain.add_filter(EditFilter())
 
     # 添加发送过滤器（发送消息）
     filter_chain.add_filter(SenderFilter())
-    
+
     # 添加回复过滤器（处理媒体组消息的评论区按钮）
     filter_chain.add_filter(ReplyFilter())
-    
+
     # 添加删除原始消息过滤器（最后执行）
     filter_chain.add_filter(DeleteOriginalFilter())
     
+    _FILTER_CHAIN = filter_chain
+    return _FILTER_CHAIN
+
+
+async def process_forward_rule(client, event, chat_id, rule):
+    """
+    处理转发规则
+    
+    Args:
+        client: 机器人客户端
+        event: 消息事件
+        chat_id: 聊天ID
+        rule: 转发规则
+        
+    Returns:
+        bool: 处理是否成功
+    """
+    logger.info(f'使用过滤器链处理规则 ID: {rule.id}')
+    
     # 执行过滤器链
-    result = await filter_chain.process(client, event, chat_id, rule)
+    result = await _get_filter_chain().process(client, event, chat_id, rule)
     
     return result 
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, Body, Request
 from fastapi.responses import Response, FileResponse
 from typing import Dict, Any
+import asyncio
 import logging
 import os
 import json
@@ -22,7 +23,7 @@ import os
 import subprocess
 import platform
 from pydantic import ValidationError
-from utils.constants import RSS_MEDIA_BASE_URL
+from utils.constants import RSS_MEDIA_BASE_URL, RSS_FEED_MAX_ENTRIES
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -108,8 +109,8 @@ async def get_feed(rule_id: int, request: Request):
         
         logger.info(f"最终使用的媒体基础URL: {base_url}")
         
-        # 获取规则对应的条目
-        entries = await get_entries(rule_id)
+        # 获取规则对应的条目，只输出最近的若干条
+        entries = await get_entries(rule_id, limit=RSS_FEED_MAX_ENTRIES)
         logger.info(f"获取到 {len(entries)} 个条目")
         
         # 如果没有条目，返回测试数据
@@ -118,8 +119,8 @@ async def get_feed(rule_id: int, request: Request):
             try:
                 fg = FeedService.generate_test_feed(rule_id, base_url)
                 
-                # 生成 RSS XML
-                rss_xml = fg.rss_str(pretty=True)
+                # 在线程中生成 RSS XML，避免lxml序列化阻塞事件循环；不格式化以减少输出体积和序列化开销
+                rss_xml = await asyncio.to_thread(fg.rss_str, pretty=False)
                 
                 # 确保rss_xml是字符串类型
                 if isinstance(rss_xml, bytes):
@@ -157,8 +158,8 @@ async def get_feed(rule_id: int, request: Request):
             try:
                 fg = await FeedService.generate_feed_from_entries(rule_id, entries, base_url)
                 
-                # 生成 RSS XML
-                rss_xml = fg.rss_str(pretty=True)
+                # 在线程中生成 RSS XML，避免lxml序列化阻塞事件循环；不格式化以减少输出体积和序列化开销
+                rss_xml = await asyncio.to_thread(fg.rss_str, pretty=False)
                 
                 # 确保rss_xml是字符串类型
                 if isinstance(rss_xml, bytes):
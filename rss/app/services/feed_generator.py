@@ -1,23 +1,136 @@
 from feedgen.feed import FeedGenerator
 from datetime import datetime, timedelta
 from ..core.config import settings
-from ..models.entry import Entry
-from typing import List
+from ..models.entry import Entry, Media
+from typing import List, Optional
 import logging
-import os
 from pathlib import Path
-import markdown
+import mistune
 import re
 import json
+from functools import lru_cache
+import asyncio
 from models.models import get_session, RSSConfig
 from utils.constants import DEFAULT_TIMEZONE
 import pytz  
 
 logger = logging.getLogger(__name__)
 
+# 标题模板配置文件路径
+TITLE_TEMPLATE_PATH = Path(__file__).parent.parent / 'configs' / 'title_template.json'
+
+# 预编译的清理用正则
+_LINK_RE = re.compile(r'\[([^\]]+)\]\([^)]+\)')
+_LEAD_STAR_RE = re.compile(r'^\*{1,2}\s*')
+_LEAD_BLANK_RE = re.compile(r'^\s*\n+')
+_DOUBLE_NL_RE = re.compile(r'\n{2,}')
+_HASH_LINE_RE = re.compile(r'^#', re.MULTILINE)
+# HTML清理：合并连续<br>、删除空段落、清空只含<br>的段落，一次扫描完成
+# 第一个分支对应逐步清理时先合并 <br><br> 再得到 <p><br></p> 的情况
+_CLEANUP_RE = re.compile(r'<p><br>(?:\s*<br>)?</p>|<br>\s*<br>|<p>\s*</p>')
+
+
+def _cleanup_sub(match: re.Match) -> str:
+    """_CLEANUP_RE 各分支的替换内容"""
+    text = match.group(0)
+    if text.startswith('<p><br>'):
+        return '<p></p>'
+    if text.startswith('<br>'):
+        return '<br>'
+    return ''
+
+# 媒体HTML片段模板（单行，避免每个条目都输出多余的缩进空白）
+_IMG_TPL = '<p><img src="{url}" alt="{alt}" style="max-width:100%;height:auto;display:block;" /></p>'
+_VIDEO_TPL = (
+    '<div style="margin:15px 0;border:1px solid #eee;padding:10px;border-radius:5px;background-color:#f9f9f9;">'
+    '<video controls width="100%" preload="none" poster="" seekable="true" controlsList="nodownload" style="width:100%;max-width:600px;display:block;margin:0 auto;">'
+    '<source src="{url}" type="{mime}">您的阅读器不支持HTML5视频播放/预览</video>'
+    '<p style="text-align:center;margin-top:8px;font-size:14px;">'
+    '<a href="{url}" target="_blank" style="display:inline-block;padding:6px 12px;background-color:#4CAF50;color:white;text-decoration:none;border-radius:4px;">'
+    '<i class="bi bi-download"></i> 下载视频: {name}</a></p></div>'
+)
+_AUDIO_TPL = (
+    '<div style="margin:15px 0;border:1px solid #eee;padding:10px;border-radius:5px;background-color:#f9f9f9;">'
+    '<audio controls style="width:100%;max-width:600px;display:block;margin:0 auto;">'
+    '<source src="{url}" type="{mime}">您的阅读器不支持HTML5音频播放/预览</audio>'
+    '<p style="text-align:center;margin-top:8px;font-size:14px;">'
+    '<a href="{url}" target="_blank">下载音频: {name}</a></p></div>'
+)
+_FILE_TPL = (
+    '<div style="margin:15px 0;padding:10px;border-radius:5px;background-color:#f5f5f5;text-align:center;">'
+    '<a href="{url}" target="_blank" style="display:inline-block;padding:8px 16px;background-color:#4CAF50;color:white;text-decoration:none;border-radius:4px;">'
+    '下载文件: {name}</a></div>'
+)
+
+
+def _render_image(url: str, media: Media) -> str:
+    """图片标签 - 使用包含规则ID的URL格式"""
+    return _IMG_TPL.format(url=url, alt=media.filename)
+
+
+def _render_video(url: str, media: Media) -> str:
+    """HTML5视频播放器 - 使用内联样式"""
+    return _VIDEO_TPL.format(url=url, mime=media.type, name=media.original_name or media.filename)
+
+
+def _render_audio(url: str, media: Media) -> str:
+    """HTML5音频播放器 - 使用内联样式"""
+    return _AUDIO_TPL.format(url=url, mime=media.type, name=media.original_name or media.filename)
+
+
+def _render_file(url: str, media: Media) -> str:
+    """其他类型文件的下载链接"""
+    return _FILE_TPL.format(url=url, name=media.original_name or media.filename)
+
+
+# 媒体类型大类（MIME类型斜杠前部分）到渲染函数的映射
+_MEDIA_RENDERERS = {
+    'image': _render_image,
+    'video': _render_video,
+    'audio': _render_audio,
+}
+
+# 每个规则最近生成的Feed: {rule_id: {'key': 缓存键, 'feed': FeedGenerator}}
+_feed_cache = {}
+
+# 复用的Markdown转换器，Telegram消息只用到粗体、链接、代码和换行，无需markdown的extra扩展
+# escape=False 保留原有的HTML片段
+_MD = mistune.create_markdown(escape=False)
+
 class FeedService:
     
     
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _load_title_patterns() -> tuple:
+        """读取标题模板配置并预编译正则，结果只加载一次
+        
+        模式可通过 first_chars 声明内容必须以哪些字符开头才可能匹配，
+        据此按首字符预先分好候选模式，未声明的模式对所有内容都是候选。
+
+        Returns:
+            tuple: ({首字符: ((编译后的正则, 模式描述), ...)}, 其他首字符的候选模式)
+        """
+        logger.info(f"正在读取标题模板配置文件: {TITLE_TEMPLATE_PATH}")
+        with open(TITLE_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+            title_config = json.load(f)
+        
+        patterns = [
+            (re.compile(pattern_info['pattern'], re.MULTILINE), pattern_info['description'],
+             frozenset(pattern_info.get('first_chars', '')))
+            for pattern_info in title_config['patterns']
+        ]
+        all_first_chars = set().union(*(first_chars for _, _, first_chars in patterns))
+        
+        # 保持配置中的先后顺序
+        candidates_by_char = {
+            char: tuple((pattern, desc) for pattern, desc, first_chars in patterns
+                        if not first_chars or char in first_chars)
+            for char in all_first_chars
+        }
+        default_candidates = tuple((pattern, desc) for pattern, desc, first_chars in patterns if not first_chars)
+        return candidates_by_char, default_candidates
+
     @staticmethod
     def extract_telegram_title_and_content(content: str) -> tuple[str, str]:
         """从Telegram消息中提取标题和内容
@@ -33,20 +146,13 @@ class FeedService:
             return "", ""
             
         try:
-            # 读取标题模板配置
-            config_path = Path(__file__).parent.parent / 'configs' / 'title_template.json'
-            logger.info(f"正在读取标题模板配置文件: {config_path}")
-            with open(config_path, 'r', encoding='utf-8') as f:
-                title_config = json.load(f)
-                
-            # 遍历每个模式
-            for pattern_info in title_config['patterns']:
-                pattern_str = pattern_info['pattern']
-                pattern_desc = pattern_info['description']
-                logger.debug(f"尝试匹配模式: {pattern_desc} ({pattern_str})")
-                
-                # 编译正则表达式
-                pattern = re.compile(pattern_str, re.MULTILINE)
+            # 按首字符取出可能匹配的模式，普通文本不必尝试带标记的模式
+            candidates_by_char, default_candidates = FeedService._load_title_patterns()
+            candidates = candidates_by_char.get(content[0], default_candidates)
+            
+            # 遍历每个预编译的模式
+            for pattern, pattern_desc in candidates:
+                logger.debug("尝试匹配模式: %s (%s)", pattern_desc, pattern.pattern)
                 
                 # 尝试匹配
                 match = pattern.match(content)
@@ -56,29 +162,35 @@ class FeedService:
                     start, end = match.span(0)
                     # 提取剩余内容，去除开头的空白字符
                     remaining_content = content[end:].lstrip()
-                    logger.info(f"成功匹配到标题模式: {pattern_desc}")
-                    logger.info(f"原始内容: {content[:100]}...")  # 只显示前100个字符
-                    logger.info(f"匹配模式: {pattern_str}")
-                    logger.info(f"提取的标题: {title}")
-                    logger.info(f"剩余内容长度: {len(remaining_content)} 字符")
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info("成功匹配到标题模式: %s", pattern_desc)
+                        logger.info("原始内容: %s...", content[:100])  # 只显示前100个字符
+                        logger.info("匹配模式: %s", pattern.pattern)
+                        logger.info("提取的标题: %s", title)
+                        logger.info("剩余内容长度: %s 字符", len(remaining_content))
                     return title, remaining_content
                     
             # 如果没有匹配到任何模式，使用前20个字符作为标题
             logger.info("未匹配到任何标题模式，使用前20个字符作为标题")
-            # 去除内容中的换行符，并限制标题长度为20个字符
-            clean_content = FeedService.clean_content(content)
-            clean_content = clean_content.replace('\n', ' ').strip()
-            title = clean_content[:20]
-            if len(clean_content) > 20:
-                title += "..."
-            logger.debug(f"生成的默认标题: {title}")
-            return title, content
+            return FeedService._default_title(content), content
             
         except Exception as e:
-            logger.error(f"提取标题和内容时出错: {str(e)}")
+            logger.error("提取标题和内容时出错: %s", e)
             return "", content
     
 
+    @staticmethod
+    def _default_title(content: str) -> str:
+        """使用内容的前20个字符作为默认标题"""
+        # 去除内容中的换行符，并限制标题长度为20个字符
+        clean_content = FeedService.clean_content(content)
+        clean_content = clean_content.replace('\n', ' ').strip()
+        title = clean_content[:20]
+        if len(clean_content) > 20:
+            title += "..."
+        logger.debug("生成的默认标题: %s", title)
+        return title
+    
     @staticmethod
     def clean_title(title: str) -> str:
         """清理标题中的特殊字符和格式标记
@@ -96,7 +208,7 @@ class FeedService:
         title = title.replace('*', '')
         
         # 处理链接格式 [text](url)，保留text部分
-        title = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', title)
+        title = _LINK_RE.sub(r'\1', title)
             
         # 移除换行和首尾空白
         title = title.replace('\n', ' ').strip()
@@ -117,248 +229,83 @@ class FeedService:
             return ""
             
         # 去除开头可能的1-2个星号
-        content = re.sub(r'^\*{1,2}\s*', '', content)
+        content = _LEAD_STAR_RE.sub('', content)
         
         # 去除开头的空行
-        content = re.sub(r'^\s*\n+', '', content)
+        content = _LEAD_BLANK_RE.sub('', content)
         
         return content
     
     @staticmethod
     async def generate_feed_from_entries(rule_id: int, entries: List[Entry], base_url: str = None) -> FeedGenerator:
-        """根据真实条目生成Feed"""
-        fg = FeedGenerator()
-        # 设置编码
-        fg.load_extension('base', atom=True)
+        """根据真实条目生成Feed，条目和配置未变化时直接返回缓存的Feed"""
         rss_config = None
         
         # 如果没有提供base_url，使用配置中的默认值
         if base_url is None:
             base_url = f"http://{settings.HOST}:{settings.PORT}"
         
-        logger.info(f"生成Feed - 规则ID: {rule_id}, 条目数量: {len(entries)}, 基础URL: {base_url}")
+        logger.info("生成Feed - 规则ID: %s, 条目数量: %s, 基础URL: %s", rule_id, len(entries), base_url)
         
         session = get_session()
         try:
             rss_config = session.query(RSSConfig).filter(RSSConfig.rule_id == rule_id).first()
-            logger.info(f"获取RSS配置: {rss_config.__dict__}")
-            # 获取 Feed 标题和描述
-            if rss_config and rss_config.enable_rss:
-                if rss_config.rule_title:
-                    fg.title(rss_config.rule_title)
-                else:
-                    fg.title(f'TG Forwarder RSS - Rule {rule_id}')
-    
-                if rss_config.rule_description:
-                    fg.description(rss_config.rule_description)
-                else:
-                    fg.description(f'TG Forwarder RSS - 规则 {rule_id} 的消息')
-                    
-                # 设置语言
-                fg.language(rss_config.language or 'zh-CN')
-            else:
-                # 默认标题和描述
-                fg.title(f'TG Forwarder RSS - Rule {rule_id}')
-                fg.description(f'TG Forwarder RSS - 规则 {rule_id} 的消息')
-                fg.language('zh-CN')
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("获取RSS配置: %s", rss_config.__dict__)
         finally:
             # 确保会话被关闭
             session.close()
         
+        # 检查缓存，条目、配置和基础URL都未变化时复用上次生成的Feed
+        cache_key = FeedService._feed_cache_key(entries, rss_config, base_url)
+        cache_data = _feed_cache.get(rule_id)
+        if cache_data and cache_data['key'] == cache_key:
+            logger.info("规则 %s 的条目未变化，使用缓存的Feed", rule_id)
+            return cache_data['feed']
+        
+        fg = FeedGenerator()
+        # 设置编码
+        fg.load_extension('base', atom=True)
+        
+        # 获取 Feed 标题和描述
+        if rss_config and rss_config.enable_rss:
+            if rss_config.rule_title:
+                fg.title(rss_config.rule_title)
+            else:
+                fg.title(f'TG Forwarder RSS - Rule {rule_id}')
+
+            if rss_config.rule_description:
+                fg.description(rss_config.rule_description)
+            else:
+                fg.description(f'TG Forwarder RSS - 规则 {rule_id} 的消息')
+                
+            # 设置语言
+            fg.language(rss_config.language or 'zh-CN')
+        else:
+            # 默认标题和描述
+            fg.title(f'TG Forwarder RSS - Rule {rule_id}')
+            fg.description(f'TG Forwarder RSS - 规则 {rule_id} 的消息')
+            fg.language('zh-CN')
+        
         # 设置Feed链接
         fg.link(href=f'{base_url}/rss/feed/{rule_id}')
         
+        # 在线程中批量构建条目内容，避免阻塞事件循环
+        built_entries = await asyncio.to_thread(FeedService._build_entries, entries, rss_config, base_url)
+        
         # 添加条目
-        for entry in entries:
+        for entry, (title, content, enclosures) in built_entries:
             try:
                 fe = fg.add_entry()
                 fe.id(entry.id or entry.message_id)
-
-
-                # 初始化content变量
-                content = None
-                fe.title(entry.title)
-
-                if rss_config.is_ai_extract:
-                    fe.title(entry.title)
-                    content = entry.content
-                else:
-                    if rss_config.enable_custom_title_pattern:
-                        fe.title(entry.title)
-                    if rss_config.enable_custom_content_pattern:
-                        content = entry.content
-                    # 自动提取标题和内容
-                    if rss_config.is_auto_title or rss_config.is_auto_content:
-                        extracted_title, extracted_content = FeedService.extract_telegram_title_and_content(entry.content or "")
-                        if rss_config.is_auto_title:
-                            fe.title(extracted_title)
-                        if rss_config.is_auto_content:
-                            content = FeedService.convert_markdown_to_html(extracted_content)
-                        else:
-                            # 如果不自动提取内容，使用原始内容
-                            content = FeedService.convert_markdown_to_html(entry.content or "")
-                    else:
-                        # 如果不是自动提取，直接使用原始内容
-                        content = FeedService.convert_markdown_to_html(entry.content or "")
-
-                # 添加图片 - 针对各种RSS阅读器的优化处理
-                all_media_urls = []  # 存储所有媒体URL用于后续检查
-                
-                if entry.media:
-                    logger.info(f"处理条目 {entry.id} 的媒体文件，数量: {len(entry.media)}")
-                    # 处理每个媒体文件
-                    for idx, media in enumerate(entry.media):
-                        # 记录原始媒体URL
-                        original_url = media.url if hasattr(media, 'url') else "未知"
-                        logger.info(f"媒体 {idx+1}/{len(entry.media)} - 原始URL: {original_url}")
-                        
-                        # 构建规范化的媒体URL - 恢复为包含规则ID的格式
-                        media_filename = os.path.basename(media.url.split('/')[-1])
-                        media_url = f"/media/{entry.rule_id}/{media_filename}"
-                        full_media_url = f"{base_url}{media_url}"
-                        all_media_urls.append(full_media_url)
-                        
-                        logger.info(f"媒体 {idx+1}/{len(entry.media)} - 新URL: {full_media_url}")
-                        
-                        # 处理图片类型
-                        if media.type.startswith('image/'):
-                            try:
-                                # 构建媒体文件路径
-                                rule_media_path = settings.get_rule_media_path(entry.rule_id)
-                                media_path = os.path.join(rule_media_path, media_filename)
-                                
-                                # 添加图片标签到内容中 - 使用包含规则ID的URL格式
-                                img_tag = f'<p><img src="{full_media_url}" alt="{media.filename}" style="max-width:100%;height:auto;display:block;" /></p>'
-                                content += img_tag
-                                
-                                logger.info(f"已添加图片标签到内容中: {media_filename}")
-                            except Exception as e:
-                                logger.error(f"添加图片标签时出错: {str(e)}")
-                        elif media.type.startswith('video/'):
-                            # 为视频添加特殊处理
-                            display_name = ""
-                            if hasattr(media, "original_name") and media.original_name:
-                                display_name = media.original_name
-                            else:
-                                display_name = media.filename
-                            
-                            # 添加HTML5视频播放器 - 使用内联样式
-                            video_player = f'''
-                            <div style="margin:15px 0;border:1px solid #eee;padding:10px;border-radius:5px;background-color:#f9f9f9;">
-                                <video controls width="100%" preload="none" poster="" seekable="true" controlsList="nodownload" style="width:100%;max-width:600px;display:block;margin:0 auto;">
-                                    <source src="{full_media_url}" type="{media.type}">
-                                    您的阅读器不支持HTML5视频播放/预览
-                                </video>
-                                <p style="text-align:center;margin-top:8px;font-size:14px;">
-                                    <a href="{full_media_url}" target="_blank" style="display:inline-block;padding:6px 12px;background-color:#4CAF50;color:white;text-decoration:none;border-radius:4px;">
-                                        <i class="bi bi-download"></i> 下载视频: {display_name}
-                                    </a>
-                                </p>
-                            </div>
-                            '''
-                            content += video_player
-                            
-                            logger.info(f"添加视频播放器到内容中: {display_name}")
-                        elif media.type.startswith('audio/'):
-                            # 为音频添加特殊处理
-                            display_name = ""
-                            if hasattr(media, "original_name") and media.original_name:
-                                display_name = media.original_name
-                            else:
-                                display_name = media.filename
-                                
-                            # 添加HTML5音频播放器 - 使用内联样式
-                            audio_player = f'''
-                            <div style="margin:15px 0;border:1px solid #eee;padding:10px;border-radius:5px;background-color:#f9f9f9;">
-                                <audio controls style="width:100%;max-width:600px;display:block;margin:0 auto;">
-                                    <source src="{full_media_url}" type="{media.type}">
-                                    您的阅读器不支持HTML5音频播放/预览
-                                </audio>
-                                <p style="text-align:center;margin-top:8px;font-size:14px;">
-                                    <a href="{full_media_url}" target="_blank">下载音频: {display_name}</a>
-                                </p>
-                            </div>
-                            '''
-                            content += audio_player
-                            
-                            logger.info(f"添加音频播放器到内容中: {display_name}")
-                        else:
-                            # 其他类型文件添加下载链接
-                            display_name = ""
-                            if hasattr(media, "original_name") and media.original_name:
-                                display_name = media.original_name
-                            else:
-                                display_name = media.filename
-                            
-                            # 添加美观的下载链接
-                            file_tag = f'''
-                            <div style="margin:15px 0;padding:10px;border-radius:5px;background-color:#f5f5f5;text-align:center;">
-                                <a href="{full_media_url}" target="_blank" style="display:inline-block;padding:8px 16px;background-color:#4CAF50;color:white;text-decoration:none;border-radius:4px;">
-                                    下载文件: {display_name}
-                                </a>
-                            </div>
-                            '''
-                            content += file_tag
-                
-                # 确保content不为空，至少包含一些默认文本
-                if not content:
-                    content = "<p>该消息没有文本内容。</p>"
-                    if entry.media and len(entry.media) > 0:
-                        content += f"<p>包含 {len(entry.media)} 个媒体文件。</p>"
-                
-                # 确保content是有效的HTML
-                if not content.startswith("<"):
-                    # 预处理文本中的换行符，确保段落结构
-                    processed_content = ""
-                    paragraphs = content.split("\n\n")
-                    for p in paragraphs:
-                        if p.strip():
-                            lines = p.split("\n")
-                            processed_content += f"<p>{lines[0]}"
-                            for line in lines[1:]:
-                                if line.strip():
-                                    processed_content += f"<br>{line}"
-                            processed_content += "</p>"
-                    content = processed_content if processed_content else f"<p>{content}</p>"
-                
-                # 删除多余的HTML标签和空格，但保留有意义的段落结构
-                content = re.sub(r'<br>\s*<br>', '<br>', content)
-                content = re.sub(r'<p>\s*</p>', '', content)
-                content = re.sub(r'<p><br></p>', '<p></p>', content)
+                fe.title(title)
                 
-                # 检查内容中是否包含硬编码的本地地址
-                if "127.0.0.1" in content or "localhost" in content:
-                    logger.warning(f"内容中包含硬编码的本地地址，将替换为: {base_url}")
-                    content = content.replace(f"http://127.0.0.1:{settings.PORT}", base_url)
-                    content = content.replace(f"http://localhost:{settings.PORT}", base_url)
-                    content = content.replace(f"http://{settings.HOST}:{settings.PORT}", base_url)
-                
-                # 添加媒体附件，并确保内容中包含所有媒体
-                if entry.media:
-                    for media in entry.media:
-                        try:
-                            # 使用包含规则ID的媒体URL格式
-                            media_filename = os.path.basename(media.url.split('/')[-1])
-                            full_media_url = f"{base_url}/media/{entry.rule_id}/{media_filename}"
-                            
-                            # 确保图片等内容已经添加
-                            if media.type.startswith('image/') and full_media_url not in content:
-                                # 如果内容中没有该图片，添加
-                                img_tag = f'<p><img src="{full_media_url}" alt="{media.filename}" style="max-width:100%;" /></p>'
-                                content += img_tag
-                                logger.info(f"添加缺失的图片标签: {media_filename}")
-                            
-                            # 记录添加的媒体附件
-                            logger.info(f"添加媒体附件: {full_media_url}, 类型: {media.type}, 大小: {media.size}")
-                            
-                            # 添加enclosure
-                            fe.enclosure(
-                                url=full_media_url,
-                                length=str(media.size) if hasattr(media, 'size') else "0",
-                                type=media.type if hasattr(media, 'type') else "application/octet-stream"
-                            )
-                        except Exception as e:
-                            logger.error(f"添加媒体附件时出错: {str(e)}")
+                # 添加媒体附件
+                for url, length, media_type in enclosures:
+                    try:
+                        fe.enclosure(url=url, length=length, type=media_type)
+                    except Exception as e:
+                        logger.error("添加媒体附件时出错: %s", e)
                 
                 # 设置内容字段
                 fe.content(content, type='html')
@@ -367,17 +314,11 @@ class FeedService:
                 fe.description(content)
                 
                 # 解析ISO格式时间字符串，设置发布时间
-                try:
-                    published_dt = datetime.fromisoformat(entry.published)
-                    fe.published(published_dt)
-                except ValueError:
-                    # 如果时间格式无效，使用当前时间
-                    try:
-                        tz = pytz.timezone(DEFAULT_TIMEZONE)
-                        fe.published(datetime.now(tz))
-                    except Exception as tz_error:
-                        logger.warning(f"时区设置错误: {str(tz_error)}，使用UTC时区")
-                        fe.published(datetime.now(pytz.UTC))
+                published_dt = FeedService._parse_iso(entry.published)
+                if published_dt is None or published_dt.tzinfo is None:
+                    # 如果时间格式无效或缺少时区信息，使用当前时间
+                    published_dt = FeedService._current_time()
+                fe.published(published_dt)
                 
                 # 设置作者和链接
                 if entry.author:
@@ -386,64 +327,210 @@ class FeedService:
                 if entry.link:
                     fe.link(href=entry.link)
             except Exception as e:
-                logger.error(f"添加条目到Feed时出错: {str(e)}")
+                logger.error("添加条目到Feed时出错: %s", e)
                 continue
         
+        _feed_cache[rule_id] = {'key': cache_key, 'feed': fg}
         return fg
     
+    @staticmethod
+    def _feed_cache_key(entries: List[Entry], rss_config: RSSConfig, base_url: str) -> tuple:
+        """生成Feed缓存键，包含影响Feed输出的条目标识、RSS配置和基础URL"""
+        config_key = None
+        if rss_config:
+            config_key = (
+                rss_config.enable_rss, rss_config.rule_title, rss_config.rule_description,
+                rss_config.language, rss_config.is_ai_extract, rss_config.is_auto_title,
+                rss_config.is_auto_content, rss_config.enable_custom_title_pattern,
+                rss_config.enable_custom_content_pattern,
+            )
+        entries_key = tuple((entry.id or entry.message_id, entry.created_at) for entry in entries)
+        return base_url, config_key, entries_key
+    
+    @staticmethod
+    def _build_entry_html(entry: Entry, rss_config: RSSConfig, base_url: str, rule_media_roots: dict) -> tuple:
+        """构建单个条目的标题、HTML内容和媒体附件，不涉及FeedGenerator，可在线程中执行
+        
+        Args:
+            entry: RSS条目
+            rss_config: 规则的RSS配置
+            base_url: 媒体URL使用的基础URL
+            rule_media_roots: 按规则ID缓存的媒体URL前缀
+            
+        Returns:
+            tuple: (标题, HTML内容, [(附件URL, 长度, 类型), ...])
+        """
+        # 初始化content变量
+        content = None
+        title = entry.title
+        enclosures = []
+
+        if rss_config.is_ai_extract:
+            content = entry.content
+        else:
+            if rss_config.enable_custom_content_pattern:
+                content = entry.content
+            # 自动提取标题和内容
+            if rss_config.is_auto_title or rss_config.is_auto_content:
+                extracted_title, extracted_content = FeedService.extract_telegram_title_and_content(entry.content or "")
+                if rss_config.is_auto_title:
+                    title = extracted_title
+                if rss_config.is_auto_content:
+                    content = FeedService.convert_markdown_to_html(extracted_content)
+                else:
+                    # 如果不自动提取内容，使用原始内容
+                    content = FeedService.convert_markdown_to_html(entry.content or "")
+            else:
+                # 如果不是自动提取，直接使用原始内容
+                content = FeedService.convert_markdown_to_html(entry.content or "")
+
+        # 使用列表收集HTML片段，最后统一拼接
+        parts = [content] if content else []
+
+        # 添加媒体内容和附件 - 针对各种RSS阅读器的优化处理
+        if entry.media:
+            media_root = rule_media_roots.get(entry.rule_id)
+            if media_root is None:
+                media_root = rule_media_roots[entry.rule_id] = f"{base_url}/media/{entry.rule_id}"
+            # 已添加到内容中的图片URL，避免重复添加同一图片
+            added_image_urls = set()
+            
+            logger.info("处理条目 %s 的媒体文件，数量: %s", entry.id, len(entry.media))
+            # 处理每个媒体文件，Entry初始化时已将媒体统一转换为Media模型，字段总是存在
+            for idx, media in enumerate(entry.media):
+                # 记录原始媒体URL
+                logger.info("媒体 %s/%s - 原始URL: %s", idx + 1, len(entry.media), media.url)
+                
+                # 构建规范化的媒体URL - 恢复为包含规则ID的格式
+                media_filename = media.url.rpartition('/')[2]
+                full_media_url = f"{media_root}/{media_filename}"
+                
+                logger.info("媒体 %s/%s - 新URL: %s", idx + 1, len(entry.media), full_media_url)
+                
+                # 按媒体大类选择渲染函数，未知类型作为文件下载链接
+                kind = media.type.partition('/')[0]
+                if kind == 'image' and full_media_url in added_image_urls:
+                    logger.info("图片已存在于内容中，跳过: %s", media_filename)
+                else:
+                    renderer = _MEDIA_RENDERERS.get(kind, _render_file)
+                    parts.append(renderer(full_media_url, media))
+                    if kind == 'image':
+                        added_image_urls.add(full_media_url)
+                    logger.info("已添加媒体到内容中: %s, 类型: %s", media_filename, media.type)
+                
+                # 记录enclosure，稍后在事件循环中添加到条目
+                logger.info("添加媒体附件: %s, 类型: %s, 大小: %s", full_media_url, media.type, media.size)
+                enclosures.append((full_media_url, str(media.size), media.type))
+        
+        content = ''.join(parts)
+        
+        # 确保content不为空，至少包含一些默认文本
+        if not content:
+            content = "<p>该消息没有文本内容。</p>"
+            if entry.media and len(entry.media) > 0:
+                content += f"<p>包含 {len(entry.media)} 个媒体文件。</p>"
+        
+        # 确保content是有效的HTML
+        if not content.startswith("<"):
+            # 预处理文本中的换行符，确保段落结构
+            processed_content = "".join(
+                FeedService._paragraph_to_html(p) for p in content.split("\n\n") if p.strip()
+            )
+            content = processed_content if processed_content else f"<p>{content}</p>"
+        
+        # 删除多余的HTML标签和空格，但保留有意义的段落结构
+        content = _CLEANUP_RE.sub(_cleanup_sub, content)
+        
+        # 检查内容中是否包含硬编码的本地地址
+        if "127.0.0.1" in content or "localhost" in content:
+            logger.warning("内容中包含硬编码的本地地址，将替换为: %s", base_url)
+            content = content.replace(f"http://127.0.0.1:{settings.PORT}", base_url)
+            content = content.replace(f"http://localhost:{settings.PORT}", base_url)
+            content = content.replace(f"http://{settings.HOST}:{settings.PORT}", base_url)
+        
+        return title, content, enclosures
+    
+    @staticmethod
+    def _build_entries(entries: List[Entry], rss_config: RSSConfig, base_url: str) -> list:
+        """批量构建条目内容，单个条目出错时跳过该条目
+        
+        Returns:
+            list: [(条目, (标题, HTML内容, 附件列表)), ...]
+        """
+        results = []
+        # 每个规则的媒体URL前缀，按规则ID缓存
+        rule_media_roots = {}
+        for entry in entries:
+            try:
+                results.append((entry, FeedService._build_entry_html(entry, rss_config, base_url, rule_media_roots)))
+            except Exception as e:
+                logger.error("构建条目内容时出错: %s", e)
+        return results
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _parse_iso(value: str) -> Optional[datetime]:
+        """解析ISO格式时间字符串，格式无效时返回None
+        
+        同一批导入的条目常共用时间戳，结果按字符串缓存复用。
+        """
+        # 先检查 YYYY-MM-DD[THH:MM...] 的基本形状，明显无效的格式不必走异常流程
+        if not value or len(value) < 10 or value[4] != '-' or value[7] != '-':
+            return None
+        if len(value) > 10 and (value[10] not in 'T ' or len(value) < 16 or value[13] != ':'):
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _current_time() -> datetime:
+        """获取默认时区的当前时间，时区无效时使用UTC"""
+        try:
+            return datetime.now(pytz.timezone(DEFAULT_TIMEZONE))
+        except Exception as tz_error:
+            logger.warning("时区设置错误: %s，使用UTC时区", tz_error)
+            return datetime.now(pytz.UTC)
+    
+    @staticmethod
+    def _paragraph_to_html(paragraph: str) -> str:
+        """将纯文本段落转换为HTML段落，段内换行转换为<br>"""
+        lines = paragraph.split("\n")
+        return "<p>" + lines[0] + "".join(f"<br>{line}" for line in lines[1:] if line.strip()) + "</p>"
+    
     @staticmethod
     def _extract_chat_name(link: str) -> str:
         """从Telegram链接中提取频道/群组名称"""
         if not link or 't.me/' not in link:
             return ""
         
-        try:
-            # 例如从 https://t.me/channel_name/1234 提取 channel_name
-            parts = link.split('t.me/')
-            if len(parts) < 2:
-                return ""
-            
-            channel_part = parts[1].split('/')[0]
-            return channel_part
-        except Exception:
-            return ""
+        # 例如从 https://t.me/channel_name/1234 提取 channel_name
+        return link.partition('t.me/')[2].partition('/')[0]
 
 
 
     @staticmethod
+    @lru_cache(maxsize=512)
     def convert_markdown_to_html(text):
-        """将Markdown格式转换为HTML，使用标准markdown库，并保留换行结构"""
+        """将Markdown格式转换为HTML，使用mistune，并保留换行结构"""
         if not text:
             return ""
         
-        # 使用标准markdown库转换
+        # 使用mistune转换，空行分隔的段落由解析器直接处理
         try:
-            # 预处理文本，确保连续的换行符被正确转换成段落
-            # 先将连续的多个换行替换为特殊标记
-            text = re.sub(r'\n{2,}', '\n\n<!-- paragraph -->\n\n', text)
-            
             # 转义以#开头的标签，防止被识别为标题
-            lines = text.split('\n')
-            processed_lines = []
-            for line in lines:
-                if line.startswith('#'):
-                    line = '\\' + line
-                processed_lines.append(line + '  ')  # 添加两个空格确保换行
-            text = '\n'.join(processed_lines)
-            
-            # 使用markdown模块转换
-            html = markdown.markdown(text, extensions=['extra'])
-            
-            # 处理特殊标记，确保段落分隔
-            html = html.replace('<p><!-- paragraph --></p>', '</p><p>')
+            text = _HASH_LINE_RE.sub(r'\\#', text)
+            # 每行末尾添加两个空格确保换行
+            text = text.replace('\n', '  \n')
             
-            return html
+            return _MD(text)
         except Exception as e:
             # 如果出现异常，退回到基本处理
-            logger.error(f"Markdown转换异常: {str(e)}")
+            logger.error("Markdown转换异常: %s", e)
             
             # 改进的换行处理：将连续的两个或更多换行符转换为段落分隔
-            text = re.sub(r'\n{2,}', '</p><p>', text)
+            text = _DOUBLE_NL_RE.sub('</p><p>', text)
             
             # 将单个换行符转换为<br>
             text = text.replace('\n', '<br>')
@@ -18,6 +18,9 @@ RSS_BASE_URL = os.environ.get('RSS_BASE_URL', None)
 # RSS媒体文件的基础URL，用于生成媒体链接，如果未设置，则使用请求的URL
 RSS_MEDIA_BASE_URL = os.getenv('RSS_MEDIA_BASE_URL', '')
 
+# RSS订阅源中输出的最大条目数量，阅读器通常只关心最近的条目
+RSS_FEED_MAX_ENTRIES = int(os.getenv('RSS_FEED_MAX_ENTRIES', 100))
+
 RSS_ENABLED = os.getenv('RSS_ENABLED', 'false')
 
 RULES_PER_PAGE = int(os.getenv('RULES_PER_PAGE', 20))